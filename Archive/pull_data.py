@@ -1,14 +1,136 @@
-import requests
+import httpx
 import time
-import pandas as pd
-import json
+import msgspec
 import os
-from bs4 import BeautifulSoup
+import csv
+import gzip
+import heapq
+import shutil
+from selectolax.lexbor import LexborHTMLParser
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Shared HTTP/2 client so concurrent API calls are multiplexed over one connection
+CLIENT = httpx.Client(
+    timeout=30.0,
+    transport=httpx.HTTPTransport(
+        http2=True, retries=3, limits=httpx.Limits(max_connections=10)
+    ),
+)
+
+# Statuses retried by _api_get, and how many times
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+
+# Earliest time the next API call may be sent, pushed back by the API's backoff field
+_backoff_lock = threading.Lock()
+_backoff_until = 0.0
 
 # ---- STEP 1: FETCH ALL QUESTIONS ----
 
 
+class Question(msgspec.Struct):
+    """A collected question with only the fields we keep."""
+
+    question_id: int
+    title: str
+    body: str
+    score: int
+    creation_date: int
+    view_count: int
+    answer_count: int
+    tags: str
+
+
+# Typed views of the API payloads; fields not listed are skipped when decoding
+class _ApiQuestion(msgspec.Struct):
+    question_id: int
+    title: str = ""
+    body: str = ""
+    score: int = 0
+    creation_date: int = 0
+    view_count: int = 0
+    answer_count: int = 0
+    tags: list[str] = []
+
+
+class _QuestionPage(msgspec.Struct):
+    items: list[_ApiQuestion] = []
+    quota_remaining: int = 0
+    backoff: int = 0
+    has_more: bool = True
+
+
+class _Owner(msgspec.Struct):
+    user_id: int | str = "unknown"
+
+
+class _ApiAnswer(msgspec.Struct):
+    answer_id: int
+    question_id: int
+    score: int = 0
+    is_accepted: bool = False
+    owner: _Owner = msgspec.field(default_factory=_Owner)
+    body: str = ""
+
+
+class _AnswerPage(msgspec.Struct):
+    items: list[_ApiAnswer] = []
+    quota_remaining: int = 0
+    backoff: int = 0
+
+
+class _QuestionId(msgspec.Struct):
+    question_id: int
+
+
+_question_page_decoder = msgspec.json.Decoder(_QuestionPage)
+_answer_page_decoder = msgspec.json.Decoder(_AnswerPage)
+_question_id_decoder = msgspec.json.Decoder(_QuestionId)
+_encoder = msgspec.json.Encoder()
+
+
+def _api_get(url, params, decoder):
+    """
+    GET an API endpoint, waiting out any backoff the API has requested.
+
+    A backoff returned to one worker delays every worker's next call, since
+    Stack Exchange applies it to the whole method, not a single connection.
+    Throttled (429) and server error responses are retried up to MAX_RETRIES.
+
+    Returns:
+        tuple: (response, decoded_page), decoded_page is None unless status is 200
+    """
+    global _backoff_until
+
+    for attempt in range(MAX_RETRIES + 1):
+        with _backoff_lock:
+            wait = _backoff_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        response = CLIENT.get(url, params=params)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+
+        # Wait as long as Retry-After asks, otherwise back off exponentially
+        retry_after = response.headers.get("Retry-After", "")
+        delay = int(retry_after) if retry_after.isdigit() else 2**attempt
+        print(f"HTTP {response.status_code}, retrying in {delay}s")
+        time.sleep(delay)
+
+    if response.status_code != 200:
+        return response, None
+
+    data = decoder.decode(response.content)
+    if data.backoff:
+        print(f"API requested backoff of {data.backoff}s")
+        with _backoff_lock:
+            _backoff_until = max(_backoff_until, time.monotonic() + data.backoff)
+    return response, data
+
+
 def fetch_nlp_questions(page=1, pagesize=100, has_accepted=True):
     """
     Fetch questions tagged with 'nlp', optionally filtering for those with accepted answers.
@@ -19,7 +141,7 @@ def fetch_nlp_questions(page=1, pagesize=100, has_accepted=True):
         has_accepted: If True, only fetch questions with accepted answers
 
     Returns:
-        tuple: (questions_list, quota_remaining)
+        tuple: (list of Question, quota_remaining, has_more)
     """
     base_url = "https://api.stackexchange.com/2.3/questions"
 
@@ -39,63 +161,134 @@ def fetch_nlp_questions(page=1, pagesize=100, has_accepted=True):
         params["hasaccepted"] = "true"
 
     print(f"Fetching page {page} of NLP questions...")
-    response = requests.get(base_url, params=params)
+    response, data = _api_get(base_url, params, _question_page_decoder)
 
-    if response.status_code == 200:
-        data = response.json()
-        questions = data.get("items", [])
-        quota = data.get("quota_remaining", 0)
+    if data is not None:
+        questions = data.items
+        quota = data.quota_remaining
 
         print(f"Retrieved {len(questions)} questions (page {page})")
         print(f"API quota remaining: {quota}")
 
         # Extract only the fields we need to save memory
-        processed_questions = []
-        for q in questions:
-            processed_questions.append(
-                {
-                    "question_id": q["question_id"],
-                    "title": q.get("title", ""),
-                    "body": q.get("body", ""),
-                    "score": q.get("score", 0),
-                    "creation_date": q.get("creation_date", 0),
-                    "view_count": q.get("view_count", 0),
-                    "answer_count": q.get("answer_count", 0),
-                    "tags": ";".join(q.get("tags", [])),
-                }
+        processed_questions = [
+            Question(
+                q.question_id,
+                q.title,
+                q.body,
+                q.score,
+                q.creation_date,
+                q.view_count,
+                q.answer_count,
+                ";".join(q.tags),
             )
+            for q in questions
+        ]
 
-        return processed_questions, quota
+        return processed_questions, quota, data.has_more
     else:
         print(f"Error fetching questions: {response.status_code}")
-        return [], 0
+        return [], 0, True
+
+
+def save_questions(questions, f):
+    """Append fetched questions as gzipped JSON lines to an open binary file."""
+    if not questions:
+        return
+    # Each call writes a separate gzip member; the loaders stop at a truncated one
+    lines = b"".join(_encoder.encode(q) + b"\n" for q in questions)
+    f.write(gzip.compress(lines, compresslevel=6))
+    f.flush()
+
+
+def migrate_legacy_questions(filename="nlp_questions.jsonl.gz"):
+    """
+    Convert questions saved by older runs (a JSON array in nlp_questions.json)
+    into the gzipped JSON Lines file, if that file does not exist yet.
+    """
+    legacy_filename = filename.split(".jsonl")[0] + ".json"
+    if os.path.exists(filename) or not os.path.exists(legacy_filename):
+        return
 
+    with open(legacy_filename, "rb") as f:
+        questions = msgspec.json.decode(f.read())
 
-def save_questions(questions, filename="nlp_questions.json"):
-    """Save fetched questions to a JSON file."""
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(questions, f, ensure_ascii=False, indent=2)
-    print(f"Saved {len(questions)} questions to {filename}")
+    # Write to a temp file so an interrupted migration is simply redone next run
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as out:
+        save_questions(questions, out)
+    os.replace(tmp_filename, filename)
+    print(f"Migrated {len(questions)} questions from {legacy_filename} to {filename}")
 
 
-def load_questions(filename="nlp_questions.json"):
-    """Load questions from a JSON file."""
+def load_question_ids(filename="nlp_questions.jsonl.gz"):
+    """Stream question IDs from the questions file without keeping the records."""
+    migrate_legacy_questions(filename)
+    if not os.path.exists(filename):
+        return set()
+
+    question_ids = set()
+    try:
+        with gzip.open(filename, "rb") as f:
+            for line in f:
+                if line.strip():
+                    question_ids.add(_question_id_decoder.decode(line).question_id)
+    except EOFError:
+        # A crash mid-write left a partial gzip member at the end. Rewrite the
+        # file with the intact records so new pages are not appended after it.
+        # Anything else (BadGzipFile, zlib.error) is not a truncated write and
+        # is left to propagate rather than risk deleting valid records.
+        print(f"{filename} ends with a truncated write; keeping the intact records")
+        _repair_questions_file(filename)
+    print(f"Found {len(question_ids)} existing questions in {filename}")
+    return question_ids
+
+
+def load_questions(filename="nlp_questions.jsonl.gz"):
+    """Yield questions one at a time from a gzipped JSON Lines file."""
+    migrate_legacy_questions(filename)
     if not os.path.exists(filename):
         print(f"No questions file found at {filename}")
-        return []
+        return
+
+    try:
+        with gzip.open(filename, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield msgspec.json.decode(line)
+    except EOFError:
+        print(f"{filename} ends with a truncated write; ignoring the rest")
+
+
+def _repair_questions_file(filename):
+    """Rewrite the questions file keeping only the records before a truncated write."""
+    questions = list(load_questions(filename))
+    if not questions:
+        raise RuntimeError(
+            f"No intact records could be recovered from {filename}; "
+            "leaving it untouched. Inspect or remove it before resuming."
+        )
 
-    with open(filename, "r", encoding="utf-8") as f:
-        questions = json.load(f)
-    print(f"Loaded {len(questions)} questions from {filename}")
-    return questions
+    # Keep the original so nothing is lost if the recovery was wrong
+    backup_filename = filename + ".bak"
+    shutil.copy2(filename, backup_filename)
+
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as out:
+        save_questions(questions, out)
+    os.replace(tmp_filename, filename)
+    print(
+        f"Rewrote {filename} with {len(questions)} intact questions "
+        f"(original kept as {backup_filename})"
+    )
 
 
 def collect_all_questions(
     max_pages=300,
     start_page=11,
     has_accepted=True,
-    save_interval=5,
-    output_file="nlp_questions.json",
+    output_file="nlp_questions.jsonl.gz",
+    concurrency=4,
 ):
     """
     Collect all NLP questions up to max_pages.
@@ -104,275 +297,401 @@ def collect_all_questions(
         max_pages: Maximum number of pages to fetch
         start_page: Page to start from
         has_accepted: If True, only fetch questions with accepted answers
-        save_interval: How often to save progress
-        output_file: File to save questions to
+        output_file: gzipped JSON Lines file new questions are appended to
+        concurrency: Number of pages to fetch in parallel
 
     Returns:
-        list: All collected questions
+        int: Number of questions newly collected in this run
     """
-    # Load existing questions if file exists
-    all_questions = load_questions(output_file) if os.path.exists(output_file) else []
+    # Track question IDs to avoid duplicates; only the IDs are kept in memory
+    existing_ids = load_question_ids(output_file)
+    new_count = 0
+    pages = range(start_page, start_page + max_pages)
 
-    # Track question IDs to avoid duplicates
-    existing_ids = {q["question_id"] for q in all_questions}
-    page = start_page
+    def fetch_page(page_num):
+        return fetch_nlp_questions(page_num, 100, has_accepted)
 
-    try:
-        for page_num in range(start_page, start_page + max_pages):
-            # Fetch a page of questions
-            questions, quota = fetch_nlp_questions(page_num, 100, has_accepted)
-
-            # Add new questions (avoid duplicates)
-            new_count = 0
-            for q in questions:
-                if q["question_id"] not in existing_ids:
-                    all_questions.append(q)
-                    existing_ids.add(q["question_id"])
-                    new_count += 1
-
-            print(f"Added {new_count} new questions (total: {len(all_questions)})")
-
-            # Save at intervals
-            if page_num % save_interval == 0:
-                save_questions(all_questions, output_file)
-
-            # Stop if quota is running low
-            if quota < 5:
-                print(f"API quota running low ({quota}). Stopping.")
-                break
-
-            # Stop if no questions found (likely end of results)
-            if len(questions) == 0:
-                print("No questions found on this page. May have reached the end.")
-                # Check the next page to confirm
-                next_questions, _ = fetch_nlp_questions(page_num + 1, 100, has_accepted)
-                if len(next_questions) == 0:
-                    print("Confirmed end of results (next page is also empty).")
-                    break
-
-            # Rate limiting
-            time.sleep(1)
-
-    except KeyboardInterrupt:
-        print("\nProcess interrupted by user.")
-    except Exception as e:
-        print(f"Error: {e}")
-
-    # Final save
-    save_questions(all_questions, output_file)
-    return all_questions
+    with open(output_file, "ab") as out:
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                done = False
+                # Fetch pages in windows of `concurrency`, then handle them in order
+                for w in range(0, len(pages), concurrency):
+                    window = pages[w : w + concurrency]
+                    for questions, quota, has_more in executor.map(fetch_page, window):
+                        # Add new questions (avoid duplicates)
+                        page_questions = []
+                        for q in questions:
+                            if q.question_id not in existing_ids:
+                                page_questions.append(q)
+                                existing_ids.add(q.question_id)
+
+                        # Append only this page's new questions
+                        save_questions(page_questions, out)
+                        new_count += len(page_questions)
+                        print(
+                            f"Added {len(page_questions)} new questions "
+                            f"(total: {len(existing_ids)})"
+                        )
+
+                        # Stop if quota is running low
+                        if quota < 5:
+                            print(f"API quota running low ({quota}). Stopping.")
+                            done = True
+                            break
+
+                        # Stop once the API reports no further pages
+                        if not has_more:
+                            print("Reached the end of results.")
+                            done = True
+                            break
+
+                    if done:
+                        break
+
+        except KeyboardInterrupt:
+            print("\nProcess interrupted by user.")
+        except Exception as e:
+            print(f"Error: {e}")
+
+    return new_count
 
 
 # ---- STEP 2: FETCH ANSWERS FOR QUESTIONS ----
 
+_WS_RE = re.compile(r"\s+")
+_TAG_RE = re.compile(r"<[^>]+>")
+
 
 def clean_html(html_text):
     """Clean HTML content to plain text."""
     if not html_text:
         return ""
 
+    # Plain text with no tags or entities needs no parsing
+    if "<" not in html_text and "&" not in html_text:
+        return _WS_RE.sub(" ", html_text).strip()
+
     try:
-        soup = BeautifulSoup(html_text, "html.parser")
-        text = soup.get_text(separator=" ", strip=True)
-        # Clean up excessive whitespace
-        text = re.sub(r"\s+", " ", text).strip()
-        return text
-    except:
+        text = LexborHTMLParser(html_text).text(separator=" ", strip=True)
+    except Exception:
         # Fallback to simple regex
-        text = re.sub(r"<[^>]+>", "", html_text)
-        return re.sub(r"\s+", " ", text).strip()
+        text = _TAG_RE.sub(" ", html_text)
+    # Clean up excessive whitespace
+    return _WS_RE.sub(" ", text).strip()
+
+
+def _fetch_answer_batch(batch, batch_num):
+    """
+    Fetch answers for up to 100 question IDs in a single API call.
+
+    Returns:
+        tuple: (answers_list, quota_remaining), quota is None on error
+    """
+    ids_string = ";".join(map(str, batch))
+
+    print(f"Fetching answers for {len(batch)} questions (batch {batch_num})...")
+
+    base_url = f"https://api.stackexchange.com/2.3/questions/{ids_string}/answers"
+    params = {
+        "site": "stackoverflow",
+        "order": "desc",
+        "sort": "votes",
+        "filter": "withbody",
+        "pagesize": 100,
+    }
+
+    response, data = _api_get(base_url, params, _answer_page_decoder)
+
+    if data is not None:
+        answers = data.items
+        quota = data.quota_remaining
+
+        print(f"Retrieved {len(answers)} answers")
+        print(f"API quota remaining: {quota}")
+
+        return answers, quota
+    else:
+        print(f"Error fetching answers: {response.status_code}")
+        return [], None
 
 
-def fetch_answers_for_questions(question_ids, top_n=3):
+def fetch_answers_for_questions(
+    question_ids, top_n=3, clean=True, concurrency=3, ids_per_request=100
+):
     """
     Fetch answers for a batch of question IDs.
 
     Args:
         question_ids: List of question IDs to fetch answers for
         top_n: Number of top non-accepted answers to include
+        clean: If False, leave answer text as raw HTML for the caller to clean
+        concurrency: Number of API calls to run in parallel
+        ids_per_request: Question IDs per API call (the API allows up to 100)
 
     Returns:
-        dict: Mapping of question ID to answer information
+        dict: Mapping of question ID to answer information, with an entry for
+            every question whose request ran
     """
     if not question_ids:
         return {}
 
     # Stack Exchange API limits: max 100 IDs per request
-    batch_size = 100
+    batch_size = min(ids_per_request, 100)
     all_answers = {}
 
-    for i in range(0, len(question_ids), batch_size):
-        batch = question_ids[i : i + batch_size]
-        ids_string = ";".join(map(str, batch))
-
-        print(
-            f"Fetching answers for {len(batch)} questions (batch {i // batch_size + 1})..."
-        )
-
-        base_url = f"https://api.stackexchange.com/2.3/questions/{ids_string}/answers"
-        params = {
-            "site": "stackoverflow",
-            "order": "desc",
-            "sort": "votes",
-            "filter": "withbody",
-            "pagesize": 100,
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                _fetch_answer_batch,
+                question_ids[i : i + batch_size],
+                i // batch_size + 1,
+            ): question_ids[i : i + batch_size]
+            for i in range(0, len(question_ids), batch_size)
         }
 
-        response = requests.get(base_url, params=params)
+        # Merge batches in the order they arrive
+        for future in as_completed(futures):
+            # Batches cancelled for low quota are left out of the result
+            if future.cancelled():
+                continue
+            answers, quota = future.result()
 
-        if response.status_code == 200:
-            data = response.json()
-            answers = data.get("items", [])
-            quota = data.get("quota_remaining", 0)
-
-            print(f"Retrieved {len(answers)} answers")
-            print(f"API quota remaining: {quota}")
+            # Every question in a batch that ran gets an entry, even with no answers
+            for qid in futures[future]:
+                all_answers.setdefault(qid, {"accepted": [], "others": []})
 
             # Group answers by question ID
             for answer in answers:
-                qid = answer["question_id"]
+                qid = answer.question_id
                 if qid not in all_answers:
                     all_answers[qid] = {"accepted": [], "others": []}
 
                 # Process answer
                 answer_data = {
-                    "answer_id": answer["answer_id"],
-                    "score": answer.get("score", 0),
-                    "user_id": answer.get("owner", {}).get("user_id", "unknown"),
-                    "text": clean_html(answer.get("body", "")),
+                    "answer_id": answer.answer_id,
+                    "score": answer.score,
+                    "user_id": answer.owner.user_id,
+                    "text": clean_html(answer.body) if clean else answer.body,
                 }
 
                 # Add to appropriate list
-                if answer.get("is_accepted", False):
+                if answer.is_accepted:
                     all_answers[qid]["accepted"].append(answer_data)
                 else:
                     all_answers[qid]["others"].append(answer_data)
 
             # Check quota
-            if quota < 100:
+            if quota is not None and quota < 100:
                 print(f"API quota running low ({quota}). Consider resuming later.")
-                break
+                # Don't start new batches, but keep merging the ones already running
+                for f in futures:
+                    f.cancel()
+
+    # Keep only the top_n other answers by score (descending)
+    for answers in all_answers.values():
+        answers["others"] = heapq.nlargest(
+            top_n, answers["others"], key=lambda x: x["score"]
+        )
 
-            # Rate limiting
-            time.sleep(1)
-        else:
-            print(f"Error fetching answers: {response.status_code}")
+    return all_answers
 
-    # Sort and limit other answers
-    for qid in all_answers:
-        # Sort by score (descending)
-        all_answers[qid]["others"].sort(key=lambda x: x["score"], reverse=True)
-        # Limit to top_n
-        all_answers[qid]["others"] = all_answers[qid]["others"][:top_n]
 
-    return all_answers
+CSV_FIELDS = [
+    "question_id",
+    "title",
+    "body",
+    "score",
+    "view_count",
+    "answer_count",
+    "tags",
+    "accepted_answer",
+    "top_answer_1",
+    "top_answer_2",
+    "top_answer_3",
+]
+
+
+# Render an answer dict as the text stored in the CSV answer columns
+_format_answer = "[User {user_id} | Score: {score}]: {text}".format_map
+
+
+def _selected_answers(question, answers_data):
+    """Return the accepted and top answers written out for a question."""
+    answers = answers_data.get(question["question_id"])
+    if not answers:
+        return [], []
+    return answers["accepted"][:1], answers["others"][:3]
+
+
+def _batch_html(batch, answers_data):
+    """Flatten every HTML body in a batch into one list for cleaning."""
+    html_list = []
+    for question in batch:
+        html_list.append(question.get("body", ""))
+        accepted, others = _selected_answers(question, answers_data)
+        html_list.extend(answer["text"] for answer in accepted + others)
+    return html_list
+
+
+def _build_rows(batch, answers_data, cleaned):
+    """Combine a batch of questions with their answers using cleaned texts."""
+    # `cleaned` yields texts in the same order _batch_html collected them
+    cleaned = iter(cleaned)
+    rows = []
+    for question in batch:
+        qid = question["question_id"]
+
+        # Prepare row for CSV
+        row = {
+            "question_id": qid,
+            "title": question.get("title", ""),
+            "body": next(cleaned),
+            "score": question.get("score", 0),
+            "view_count": question.get("view_count", 0),
+            "answer_count": question.get("answer_count", 0),
+            "tags": question.get("tags", ""),
+            "accepted_answer": "",
+            "top_answer_1": "",
+            "top_answer_2": "",
+            "top_answer_3": "",
+        }
+
+        accepted, others = _selected_answers(question, answers_data)
+        for answer in accepted + others:
+            answer["text"] = next(cleaned)
+
+        # Add accepted answer (take first if multiple)
+        if accepted:
+            accepted = accepted[0]
+            row["accepted_answer"] = _format_answer(accepted)
+
+        # Add top answers
+        for idx, answer in enumerate(others):
+            col_name = f"top_answer_{idx + 1}"
+            row[col_name] = _format_answer(answer)
+
+        rows.append(row)
+    return rows
 
 
 def process_questions_with_answers(
-    questions_file="nlp_questions.json",
+    questions_file="nlp_questions.jsonl.gz",
     output_file="nlp_qa_dataset.csv",
     batch_size=30,
     top_n=3,
+    workers=None,
+    concurrency=3,
 ):
     """
     Process questions and fetch their answers.
 
     Args:
-        questions_file: JSON file containing questions
+        questions_file: gzipped JSON Lines file containing questions
         output_file: CSV file to write results to
-        batch_size: Number of questions to process in each batch
+        batch_size: Number of questions per answers API call
         top_n: Number of top non-accepted answers to include per question
+        workers: Number of processes used to clean HTML (default: CPU count)
+        concurrency: Number of answers API calls to run in parallel
     """
-    # Load questions
-    questions = load_questions(questions_file)
-    if not questions:
-        print("No questions to process.")
-        return
-
     # Check for existing processed data
     processed_ids = set()
     if os.path.exists(output_file):
         try:
-            existing_df = pd.read_csv(output_file)
-            processed_ids = set(existing_df["question_id"].tolist())
+            # Read only the question_id column instead of parsing every body
+            with open(output_file, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                processed_ids = {int(row[0]) for row in reader if row}
             print(f"Found {len(processed_ids)} already processed questions")
         except Exception as e:
             print(f"Error loading existing file: {e}")
 
-    # Filter questions that need processing
-    to_process = [q for q in questions if q["question_id"] not in processed_ids]
-    print(f"Processing {len(to_process)} questions in batches of {batch_size}")
+    # Stream questions, keeping only those that need processing
+    to_process = [
+        q
+        for q in load_questions(questions_file)
+        if q["question_id"] not in processed_ids
+    ]
+    if not to_process:
+        print("No questions to process.")
+        return
 
-    # Process in batches
-    results = []
-    for i in range(0, len(to_process), batch_size):
-        batch = to_process[i : i + batch_size]
-        print(
-            f"\nProcessing batch {i // batch_size + 1}/{(len(to_process) + batch_size - 1) // batch_size}"
-        )
+    print(
+        f"Processing {len(to_process)} questions "
+        f"({batch_size} questions per API call)"
+    )
+
+    # Open the output once and append each batch's rows as they are ready
+    write_header = not os.path.exists(output_file) or os.path.getsize(output_file) == 0
+    with open(output_file, "a", newline="", encoding="utf-8") as csv_f:
+        writer = csv.DictWriter(csv_f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        if write_header:
+            writer.writeheader()
+
+        total = len(processed_ids)
+
+        def save_batch(batch, answers_data, cleaned):
+            nonlocal total
+            rows = _build_rows(batch, answers_data, cleaned)
+            writer.writerows(rows)
+            csv_f.flush()
+            total += len(rows)
+            print(
+                f"Updated {output_file} with {len(rows)} new records (total: {total})"
+            )
 
-        # Get question IDs for this batch
-        question_ids = [q["question_id"] for q in batch]
-
-        # Fetch answers for this batch
-        answers_data = fetch_answers_for_questions(question_ids, top_n)
-
-        # Combine questions with their answers
-        for question in batch:
-            qid = question["question_id"]
-
-            # Clean question body
-            clean_body = clean_html(question.get("body", ""))
-
-            # Prepare row for CSV
-            row = {
-                "question_id": qid,
-                "title": question.get("title", ""),
-                "body": clean_body,
-                "score": question.get("score", 0),
-                "view_count": question.get("view_count", 0),
-                "answer_count": question.get("answer_count", 0),
-                "tags": question.get("tags", ""),
-                "accepted_answer": "",
-                "top_answer_1": "",
-                "top_answer_2": "",
-                "top_answer_3": "",
-            }
-
-            # Add answers if available
-            if qid in answers_data:
-                # Add accepted answer
-                if answers_data[qid]["accepted"]:
-                    accepted = answers_data[qid]["accepted"][
-                        0
-                    ]  # Take first if multiple
-                    row["accepted_answer"] = (
-                        f"[User {accepted['user_id']} | Score: {accepted['score']}]: {accepted['text']}"
+        # Process in batches
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            previous = None
+            try:
+                # Each batch covers `concurrency` API calls of batch_size questions
+                step = batch_size * concurrency
+                for i in range(0, len(to_process), step):
+                    batch = to_process[i : i + step]
+                    print(
+                        f"\nProcessing batch {i // step + 1}/{(len(to_process) + step - 1) // step}"
                     )
 
-                # Add top answers
-                for idx, answer in enumerate(answers_data[qid]["others"][:3]):
-                    col_name = f"top_answer_{idx + 1}"
-                    row[col_name] = (
-                        f"[User {answer['user_id']} | Score: {answer['score']}]: {answer['text']}"
+                    # Get question IDs for this batch
+                    question_ids = [q["question_id"] for q in batch]
+
+                    # Fetch answers for this batch, one API call per batch_size IDs
+                    answers_data = fetch_answers_for_questions(
+                        question_ids,
+                        top_n,
+                        clean=False,
+                        concurrency=concurrency,
+                        ids_per_request=batch_size,
                     )
 
-            results.append(row)
-
-        # Save progress
-        if results:
-            new_df = pd.DataFrame(results)
-            if os.path.exists(output_file) and processed_ids:
-                # Append new data
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                combined_df.to_csv(output_file, index=False, encoding="utf-8")
-                print(
-                    f"Updated {output_file} with {len(new_df)} new records (total: {len(combined_df)})"
-                )
-            else:
-                # Create new file
-                new_df.to_csv(output_file, index=False, encoding="utf-8")
-                print(f"Created {output_file} with {len(new_df)} records")
+                    # Leave questions whose request never ran for the next resume
+                    skipped = [q for q in batch if q["question_id"] not in answers_data]
+                    if skipped:
+                        print(f"Skipping {len(skipped)} questions until the next run")
+                        batch = [q for q in batch if q["question_id"] in answers_data]
+
+                    # Clean this batch in worker processes while the next one is fetched
+                    cleaned = executor.map(
+                        clean_html, _batch_html(batch, answers_data), chunksize=16
+                    )
+                    pending, previous = previous, (batch, answers_data, cleaned)
+                    if pending:
+                        save_batch(*pending)
+            finally:
+                # Always save a batch that was already fetched, even if a later
+                # fetch failed or was interrupted
+                if previous:
+                    batch, answers_data, cleaned = previous
+                    try:
+                        cleaned = list(cleaned)
+                    except (Exception, KeyboardInterrupt):
+                        # The pool may be gone after Ctrl-C; clean in this process
+                        cleaned = [
+                            clean_html(html)
+                            for html in _batch_html(batch, answers_data)
+                        ]
+                    save_batch(batch, answers_data, cleaned)
 
     print("\nProcessing complete!")
 
@@ -386,19 +705,19 @@ def main():
 
     # Step 1: Collect all questions first
     print("\n--- STEP 1: Collecting Questions ---")
-    questions = collect_all_questions(
+    new_count = collect_all_questions(
         max_pages=100,  # Adjust based on your needs
         has_accepted=True,  # Only get questions with accepted answers
-        save_interval=2,  # Save every 2 pages
-        output_file="nlp_questions.json",
+        output_file="nlp_questions.jsonl.gz",
     )
+    print(f"Collected {new_count} new questions")
 
     # Step 2: Process answers separately
     print("\n--- STEP 2: Collecting Answers ---")
     process_questions_with_answers(
-        questions_file="nlp_questions.json",
+        questions_file="nlp_questions.jsonl.gz",
         output_file="nlp_qa_dataset.csv",
-        batch_size=30,  # Process 30 questions at a time
+        batch_size=30,  # 30 questions per answers API call
         top_n=3,  # Get top 3 non-accepted answers
     )
 
@@ -410,8 +729,7 @@ def step1_only():
         start_page=28,
         max_pages=100,
         has_accepted=True,
-        save_interval=2,
-        output_file="nlp_questions.json",
+        output_file="nlp_questions.jsonl.gz",
     )
 
 
@@ -419,7 +737,7 @@ def step1_only():
 def step2_only():
     print("Processing answers for existing questions...")
     process_questions_with_answers(
-        questions_file="nlp_questions.json",
+        questions_file="nlp_questions.jsonl.gz",
         output_file="nlp_qa_dataset.csv",
         batch_size=30,
         top_n=3,